@@ -1,17 +1,84 @@
 """
 AI agents for the EidiCard generator.
 """
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 import litellm
 from loguru import logger
 from pydantic import BaseModel
+from diskcache import Cache
+import numpy as np
+import asyncio
+import hashlib
+import json
 import random
 import os
+import threading
+import time
+import weakref
 
 # Configure LiteLLM to use OpenRouter
 litellm.set_verbose = False
 litellm.api_base = "https://openrouter.ai/api/v1/chat/completions"
 
+# Cache for LLM responses, keyed by a hash of the full request
+CACHE_DIR = os.path.expanduser("~/.eidicard_cache")
+CACHE_EXPIRE = 86400  # seconds
+RESPONSE_CACHE = Cache(CACHE_DIR)
+
+# Semantic cache settings for near-duplicate greeting requests
+EMBEDDING_MODEL = "openrouter/text-embedding-3-small"
+SIMILARITY_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+
+# Maximum number of LLM requests in flight at once, to respect rate limits
+MAX_CONCURRENT_REQUESTS = 10
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """
+    Get the request-limiting semaphore for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return semaphore
+
+def _normalize(vector: List[float]) -> Optional[np.ndarray]:
+    """
+    L2-normalize an embedding so dot products give cosine similarity.
+    """
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else None
+
+SYSTEM_PROMPT = """You are an expert at crafting personalized Eid greetings. 
+                    Your task is to generate warm, culturally appropriate Eid messages.
+                    Always include warm wishes, blessings, and maintain the specified tone.
+                    Make messages personal and heartfelt."""
+
+# Greeting prompt: the static instructions come first and the per-request
+# details last, so providers that cache prompt prefixes can reuse the prefix
+GREETING_PROMPT = """
+        Generate a heartfelt Eid greeting message using the details below.
+        
+        Guidelines:
+        - Make it personal and warm
+        - Keep it appropriate for the specified tone
+        - If including Hadith, use a relevant one about Eid, celebration, or giving
+        - If including Urdu, add 'Eid Mubarak' in Urdu script (عید مبارک)
+        - Length should be 2-3 paragraphs
+        - Add appropriate line breaks for readability
+        - Do not include any emojis in the response
+        
+        Details:
+        - Tone should be: {tone}
+        - Include Hadith: {include_hadith}
+        - Include Urdu: {include_urdu}
+        - Recipient name: {recipient}
+        - Sender name: {sender}
+        """
+
 # Default message if AI fails
 DEFAULT_MESSAGE = """
 May this Eid bring you joy, peace, and prosperity! 🌙✨
@@ -27,6 +94,142 @@ EMOJI_SETS = {
     "religious": ["🕌", "☪️", "🌙", "✨", "🤲", "📿", "🌟", "💫", "🌺", "🌸"],
     "formal": ["🌺", "🎀", "✨", "💫", "🌸", "🌹", "🌷", "🎗️", "🌟", "💐"]
 }
+_EMOJI_ARRAYS = {tone: tuple(emojis) for tone, emojis in EMOJI_SETS.items()}
+
+class SemanticCache:
+    """
+    Reuse responses for requests whose embeddings are nearly identical.
+
+    Each entry also records a group of parameters that must match exactly
+    (tone, Hadith, Urdu, sender and the recipient, whom the greeting names),
+    so a hit never breaks a setting or greets someone else. Entries expire
+    like the exact cache, and only the newest max_entries are kept.
+
+    Embeddings are stored L2-normalized, so a dot product gives the cosine
+    similarity. Everything is persisted to a single .npz file.
+    """
+    # Bumped whenever the meaning of stored entries changes
+    VERSION = 3
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = SIMILARITY_THRESHOLD,
+        expire: float = CACHE_EXPIRE,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.expire = expire
+        self.max_entries = max_entries
+        self._clear()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _clear(self) -> None:
+        self.embeddings: Optional[np.ndarray] = None
+        self.groups = np.array([], dtype=str)
+        self.timestamps = np.array([], dtype=np.float64)
+        self.responses: List[str] = []
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                if "version" not in data.files or int(data["version"]) != self.VERSION:
+                    logger.info("Discarding semantic cache written by an older version")
+                    return
+                self.embeddings = data["embeddings"]
+                self.groups = data["groups"]
+                self.timestamps = data["timestamps"]
+                self.responses = data["responses"].tolist()
+            self._prune()
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache: {e}")
+            self._clear()
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=self.VERSION,
+                embeddings=self.embeddings,
+                groups=self.groups,
+                timestamps=self.timestamps,
+                responses=np.array(self.responses)
+            )
+        os.replace(tmp_path, self.path)
+
+    def _prune(self) -> None:
+        """
+        Drop expired entries, then all but the newest max_entries.
+        """
+        keep = np.flatnonzero(time.time() - self.timestamps < self.expire)[-self.max_entries:]
+        if len(keep) == len(self.responses):
+            return
+        if len(keep) == 0:
+            self._clear()
+            return
+        self.embeddings = self.embeddings[keep]
+        self.groups = self.groups[keep]
+        self.timestamps = self.timestamps[keep]
+        self.responses = [self.responses[i] for i in keep]
+
+    def lookup(self, query: np.ndarray, group: str) -> Optional[str]:
+        """
+        Return the unexpired stored response from the same parameter group
+        most similar to the query, if close enough.
+        """
+        with self._lock:
+            if self.embeddings is None or self.embeddings.shape[1] != query.shape[0]:
+                return None
+            sims = self.embeddings @ query
+            # The group's parameters are hard constraints, not fuzzy ones
+            sims[self.groups != group] = -1.0
+            sims[time.time() - self.timestamps >= self.expire] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] > self.threshold:
+                logger.debug(f"Semantic cache hit (similarity {sims[best]:.3f})")
+                return self.responses[best]
+        return None
+
+    def add(self, query: np.ndarray, group: str, response: str) -> None:
+        """
+        Store a response under its normalized query embedding.
+        """
+        with self._lock:
+            row = query[np.newaxis, :]
+            if self.embeddings is None or self.embeddings.shape[1] != query.shape[0]:
+                self._clear()
+                self.embeddings = row
+            else:
+                self.embeddings = np.vstack([self.embeddings, row])
+            self.groups = np.append(self.groups, group)
+            self.timestamps = np.append(self.timestamps, time.time())
+            self.responses.append(response)
+            self._prune()
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not save semantic cache: {e}")
+
+SEMANTIC_CACHE = SemanticCache(os.path.join(CACHE_DIR, "greetings.npz"))
+
+# One agent per process, shared by the module-level helpers
+_AGENT_SINGLETON: Optional["EidAgent"] = None
+_LOCK = threading.Lock()
+
+def _get_agent(api_key: str) -> "EidAgent":
+    """
+    Get the shared EidAgent, creating it on first use or when the key changes.
+    """
+    global _AGENT_SINGLETON
+    with _LOCK:
+        if _AGENT_SINGLETON is None or _AGENT_SINGLETON.api_key != api_key:
+            _AGENT_SINGLETON = EidAgent(api_key)
+        return _AGENT_SINGLETON
 
 def generate_eid_message(
     recipient: str,
@@ -54,18 +257,68 @@ def generate_eid_message(
     if not api_key:
         return DEFAULT_MESSAGE
         
-    eid_agent = EidAgent(api_key)
-    message_agent = MessageCraftAgent(eid_agent)
-    
-    preferences = {
-        "include_hadith": include_hadith,
-        "include_urdu": include_urdu,
-        "include_emojis": include_emojis,
-        "emoji_count": 2 if include_emojis else 0,
-        "sender": sender
-    }
+    return _get_agent(api_key).generate_greeting(
+        recipient=recipient,
+        tone=tone,
+        include_hadith=include_hadith,
+        include_urdu=include_urdu,
+        emoji_count=2 if include_emojis else 0,
+        sender=sender
+    )
+
+async def agenerate_eid_message(
+    recipient: str,
+    tone: str = "formal",
+    sender: str = "",
+    include_hadith: bool = False,
+    include_urdu: bool = False,
+    include_emojis: bool = True
+) -> str:
+    """
+    Async version of generate_eid_message, for generating several cards at once.
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return DEFAULT_MESSAGE
+        
+    return await _get_agent(api_key).agenerate_greeting(
+        recipient=recipient,
+        tone=tone,
+        include_hadith=include_hadith,
+        include_urdu=include_urdu,
+        emoji_count=2 if include_emojis else 0,
+        sender=sender
+    )
+
+def stream_eid_message(
+    recipient: str,
+    tone: str = "formal",
+    sender: str = "",
+    include_hadith: bool = False,
+    include_urdu: bool = False,
+    include_emojis: bool = True
+) -> Iterator[str]:
+    """
+    Stream a personalized Eid greeting message as it is generated.
     
-    return message_agent.craft_message(recipient, tone, preferences)
+    Takes the same arguments as generate_eid_message.
+        
+    Yields:
+        str: Successive chunks of the greeting message
+    """
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        yield DEFAULT_MESSAGE
+        return
+        
+    yield from _get_agent(api_key).stream_greeting(
+        recipient=recipient,
+        tone=tone,
+        include_hadith=include_hadith,
+        include_urdu=include_urdu,
+        emoji_count=2 if include_emojis else 0,
+        sender=sender
+    )
 
 class EidAgent:
     def __init__(self, api_key: str):
@@ -79,40 +332,254 @@ class EidAgent:
         litellm.api_key = api_key
         # Using Mistral's latest model from OpenRouter
         self.model = "openrouter/mistral-7b-instruct"
+        # Every completion is cached, so sample deterministically; a cache hit
+        # is then the same text a fresh call would have returned
+        self.temperature = 0
         self.conversation_history = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_key(self, prompt: str) -> str:
+        """
+        Build a deterministic cache key for a prompt.
+        """
+        payload = json.dumps(
+            {"model": self.model, "sys": SYSTEM_PROMPT, "user": prompt, "temp": self.temperature},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_lookup(self, key: str) -> Optional[str]:
+        """
+        Look up a cached completion and record the hit or miss.
+        """
+        cached = RESPONSE_CACHE.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            logger.debug(f"LLM cache hit ({self.cache_hits} hits, {self.cache_misses} misses)")
+        else:
+            self.cache_misses += 1
+            logger.debug(f"LLM cache miss ({self.cache_hits} hits, {self.cache_misses} misses)")
+        return cached
+
+    def _cache_store(self, key: str, text: str) -> None:
+        """
+        Store a completion, skipping the fallback message so failures are retried.
+        """
+        if text != DEFAULT_MESSAGE:
+            RESPONSE_CACHE.set(key, text, expire=CACHE_EXPIRE)
+
+    def _cached_completion(self, prompt: str) -> str:
+        """
+        Get completion from the cache, falling back to the LLM on a miss.
+        """
+        key = self._cache_key(prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        text = self._get_completion(prompt)
+        self._cache_store(key, text)
+        return text
+
+    async def _acached_completion(self, prompt: str) -> str:
+        """
+        Async version of _cached_completion.
+        """
+        key = self._cache_key(prompt)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        text = await self._acomplete(prompt)
+        self._cache_store(key, text)
+        return text
     
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """
+        Get an L2-normalized embedding for the text, or None on failure.
+        """
+        try:
+            response = litellm.embedding(model=EMBEDDING_MODEL, input=[text])
+            return _normalize(response.data[0]["embedding"])
+        except Exception as e:
+            logger.warning(f"Error getting embedding: {e}")
+            return None
+
+    async def _aembed(self, text: str) -> Optional[np.ndarray]:
+        """
+        Async version of _embed.
+        """
+        try:
+            async with _llm_semaphore():
+                response = await litellm.aembedding(model=EMBEDDING_MODEL, input=[text])
+            return _normalize(response.data[0]["embedding"])
+        except Exception as e:
+            logger.warning(f"Error getting embedding: {e}")
+            return None
+
+    def _completion_kwargs(self, prompt: str) -> Dict:
+        """
+        Build the keyword arguments shared by sync and async completion calls.
+        """
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 500,
+            "temperature": self.temperature,
+            "headers": {
+                "HTTP-Referer": "https://localhost:8501",
+                "X-Title": "EidiCard Generator"
+            }
+        }
+
     def _get_completion(self, prompt: str) -> str:
         """
         Get completion from the LLM.
         """
         try:
-            messages = [
-                {
-                    "role": "system", 
-                    "content": """You are an expert at crafting personalized Eid greetings. 
-                    Your task is to generate warm, culturally appropriate Eid messages.
-                    Always include warm wishes, blessings, and maintain the specified tone.
-                    Make messages personal and heartfelt."""
-                },
-                {"role": "user", "content": prompt}
-            ]
-            
-            response = litellm.completion(
-                model=self.model,
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7,
-                headers={
-                    "HTTP-Referer": "https://localhost:8501",
-                    "X-Title": "EidiCard Generator"
-                }
-            )
+            response = litellm.completion(**self._completion_kwargs(prompt))
             return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"Error getting completion: {e}")
             # Return a default message instead of error message
             return DEFAULT_MESSAGE
 
+    def stream_completion(self, prompt: str) -> Iterator[str]:
+        """
+        Stream completion chunks from the LLM as they arrive.
+        
+        Raises on failure rather than yielding a fallback, so callers can
+        tell a failed request apart from a generated greeting.
+        """
+        try:
+            response = litellm.completion(**self._completion_kwargs(prompt), stream=True)
+            for chunk in response:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        except Exception as e:
+            logger.error(f"Error streaming completion: {e}")
+            raise
+
+    async def _acomplete(self, prompt: str) -> str:
+        """
+        Get completion from the LLM without blocking the event loop.
+        """
+        try:
+            async with _llm_semaphore():
+                response = await litellm.acompletion(**self._completion_kwargs(prompt))
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Error getting completion: {e}")
+            # Return a default message instead of error message
+            return DEFAULT_MESSAGE
+
+    @staticmethod
+    def _greeting_prompt(
+        recipient: str,
+        tone: str,
+        include_hadith: bool,
+        include_urdu: bool,
+        sender: str
+    ) -> str:
+        return GREETING_PROMPT.format(
+            recipient=recipient,
+            tone=tone,
+            include_hadith=include_hadith,
+            include_urdu=include_urdu,
+            sender=sender if sender else "Not specified"
+        )
+
+    def _greeting_cache_key(
+        self,
+        recipient: str,
+        tone: str,
+        include_hadith: bool,
+        include_urdu: bool,
+        sender: str
+    ) -> str:
+        """
+        Build a cache key from the greeting parameters rather than the full
+        prompt, so trivially different names ("Ali " vs "ali") share an entry.
+        """
+        payload = json.dumps(
+            {
+                "model": self.model,
+                "sys": SYSTEM_PROMPT,
+                "template": GREETING_PROMPT,
+                "temp": self.temperature,
+                "params": [
+                    tone, include_hadith, include_urdu,
+                    recipient.lower().strip(), sender.lower().strip()
+                ]
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _greeting_group(
+        recipient: str,
+        tone: str,
+        include_hadith: bool,
+        include_urdu: bool,
+        sender: str
+    ) -> str:
+        """
+        The parameters a semantic cache hit must match exactly.
+        """
+        return "|".join(
+            str(part).strip().lower()
+            for part in (tone, include_hadith, include_urdu, recipient, sender)
+        )
+
+    @staticmethod
+    def _greeting_cache_text(
+        recipient: str,
+        tone: str,
+        include_hadith: bool,
+        include_urdu: bool,
+        sender: str
+    ) -> str:
+        # The recipient must match exactly, so it is left out of the embedding
+        return "|".join(
+            str(part).strip().lower()
+            for part in (tone, include_hadith, include_urdu, sender)
+        )
+
+    def _semantic_lookup(self, query: Optional[np.ndarray], params: tuple) -> Optional[str]:
+        if query is None:
+            return None
+        return SEMANTIC_CACHE.lookup(query, self._greeting_group(*params))
+
+    def _remember_greeting(
+        self,
+        key: str,
+        query: Optional[np.ndarray],
+        params: tuple,
+        response: str
+    ) -> None:
+        self._cache_store(key, response)
+        if query is not None and response != DEFAULT_MESSAGE:
+            SEMANTIC_CACHE.add(query, self._greeting_group(*params), response)
+
+    @staticmethod
+    def _pick_emojis(tone: str, emoji_count: int) -> str:
+        emojis = _EMOJI_ARRAYS.get(tone)
+        if emoji_count > 0 and emojis:
+            # Select random emojis from the tone's set
+            return " ".join(random.sample(emojis, min(emoji_count, len(emojis))))
+        return ""
+
+    def _add_emojis(self, response: str, tone: str, emoji_count: int) -> str:
+        # Add emojis at start and end if requested
+        emoji_str = self._pick_emojis(tone, emoji_count)
+        if emoji_str:
+            response = f"{emoji_str}\n{response}\n{emoji_str}"
+        return response
+
     def generate_greeting(
         self,
         recipient: str,
@@ -125,42 +592,102 @@ class EidAgent:
         """
         Generate a personalized Eid greeting.
         """
-        prompt = f"""
-        Generate a heartfelt Eid greeting message for {recipient}.
+        params = (recipient, tone, include_hadith, include_urdu, sender)
         
-        Requirements:
-        - Tone should be: {tone}
-        - Include Hadith: {include_hadith}
-        - Include Urdu: {include_urdu}
-        - Sender name: {sender if sender else "Not specified"}
+        # Check the exact cache first; it is a local lookup, unlike the
+        # embedding call the semantic cache needs
+        key = self._greeting_cache_key(*params)
+        response = self._cache_lookup(key)
+        if response is None:
+            # Reuse the response of a near-identical earlier request if we have one
+            query = self._embed(self._greeting_cache_text(*params))
+            response = self._semantic_lookup(query, params)
+            if response is None:
+                response = self._get_completion(self._greeting_prompt(*params))
+                self._remember_greeting(key, query, params, response)
         
-        Guidelines:
-        - Make it personal and warm
-        - Keep it appropriate for the specified tone
-        - If including Hadith, use a relevant one about Eid, celebration, or giving
-        - If including Urdu, add 'Eid Mubarak' in Urdu script (عید مبارک)
-        - Length should be 2-3 paragraphs
-        - Add appropriate line breaks for readability
-        - Do not include any emojis in the response
+        return self._add_emojis(response, tone, emoji_count)
+
+    async def agenerate_greeting(
+        self,
+        recipient: str,
+        tone: str,
+        include_hadith: bool = False,
+        include_urdu: bool = False,
+        emoji_count: int = 2,
+        sender: str = ""
+    ) -> str:
+        """
+        Async version of generate_greeting.
         """
+        params = (recipient, tone, include_hadith, include_urdu, sender)
         
-        response = self._get_completion(prompt)
+        key = self._greeting_cache_key(*params)
+        response = self._cache_lookup(key)
+        if response is None:
+            query = await self._aembed(self._greeting_cache_text(*params))
+            response = self._semantic_lookup(query, params)
+            if response is None:
+                response = await self._acomplete(self._greeting_prompt(*params))
+                self._remember_greeting(key, query, params, response)
         
-        # Add emojis if requested
-        if emoji_count > 0 and tone in EMOJI_SETS:
-            # Select random emojis from the tone's set
-            emojis = random.sample(EMOJI_SETS[tone], min(emoji_count, len(EMOJI_SETS[tone])))
-            emoji_str = " ".join(emojis)
-            # Add emojis at start and end
-            response = f"{emoji_str}\n{response}\n{emoji_str}"
-        
-        return response
+        return self._add_emojis(response, tone, emoji_count)
 
-    def suggest_theme(self, tone: str, message: str) -> str:
+    def stream_greeting(
+        self,
+        recipient: str,
+        tone: str,
+        include_hadith: bool = False,
+        include_urdu: bool = False,
+        emoji_count: int = 2,
+        sender: str = ""
+    ) -> Iterator[str]:
         """
-        Suggest an appropriate theme based on the message tone and content.
+        Stream a personalized Eid greeting, serving cached greetings in one chunk.
         """
-        prompt = f"""
+        params = (recipient, tone, include_hadith, include_urdu, sender)
+        emoji_str = self._pick_emojis(tone, emoji_count)
+        if emoji_str:
+            yield f"{emoji_str}\n"
+        
+        key = self._greeting_cache_key(*params)
+        response = self._cache_lookup(key)
+        if response is None:
+            query = self._embed(self._greeting_cache_text(*params))
+            response = self._semantic_lookup(query, params)
+        if response is not None:
+            yield response
+        else:
+            chunks = []
+            try:
+                for chunk in self.stream_completion(self._greeting_prompt(*params)):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception:
+                # A message cut off mid-stream can't be recovered, so let it surface
+                if chunks:
+                    raise
+            if chunks:
+                self._remember_greeting(key, query, params, "".join(chunks).strip())
+            else:
+                # Nothing was generated; show the default message but never cache it
+                yield DEFAULT_MESSAGE
+        
+        if emoji_str:
+            yield f"\n{emoji_str}"
+
+    @staticmethod
+    def _theme_prompt(tone: str, message: Optional[str]) -> str:
+        if message is None:
+            return f"""
+        Based on the following message tone, suggest the most appropriate theme
+        from these options: classic, modern, elegant
+        
+        Tone: {tone}
+        
+        Reply with just the theme name in lowercase.
+        """
+        return f"""
         Based on the following message tone and content, suggest the most appropriate theme
         from these options: classic, modern, elegant
         
@@ -169,10 +696,25 @@ class EidAgent:
         
         Reply with just the theme name in lowercase.
         """
-        
-        theme = self._get_completion(prompt).strip().lower()
+
+    @staticmethod
+    def _parse_theme(text: str) -> str:
+        theme = text.strip().lower()
         return theme if theme in ["classic", "modern", "elegant"] else "classic"
 
+    def suggest_theme(self, tone: str, message: Optional[str] = None) -> str:
+        """
+        Suggest an appropriate theme based on the message tone and content.
+        """
+        return self._parse_theme(self._cached_completion(self._theme_prompt(tone, message)))
+
+    async def asuggest_theme(self, tone: str, message: Optional[str] = None) -> str:
+        """
+        Async version of suggest_theme. Leave out the message to run it
+        concurrently with message generation.
+        """
+        return self._parse_theme(await self._acached_completion(self._theme_prompt(tone, message)))
+
     def enhance_message(self, message: str, tone: str) -> str:
         """
         Enhance a message with appropriate emojis and formatting.
@@ -187,7 +729,7 @@ class EidAgent:
         Return the enhanced message with emojis placed naturally.
         """
         
-        enhanced = self._get_completion(prompt)
+        enhanced = self._cached_completion(prompt)
         return enhanced if enhanced != DEFAULT_MESSAGE else message
 
 class MessageCraftAgent:
@@ -212,6 +754,24 @@ class MessageCraftAgent:
             sender=preferences.get("sender", "")
         )
 
+    async def acraft_message(
+        self,
+        recipient: str,
+        tone: str,
+        preferences: Dict[str, bool]
+    ) -> str:
+        """
+        Async version of craft_message.
+        """
+        return await self.eid_agent.agenerate_greeting(
+            recipient=recipient,
+            tone=tone,
+            include_hadith=preferences.get("include_hadith", False),
+            include_urdu=preferences.get("include_urdu", False),
+            emoji_count=preferences.get("emoji_count", 2) if preferences.get("include_emojis", True) else 0,
+            sender=preferences.get("sender", "")
+        )
+
 class StyleAgent:
     def __init__(self, eid_agent: EidAgent):
         self.eid_agent = eid_agent
@@ -220,4 +780,10 @@ class StyleAgent:
         """
         Get an appropriate theme for the message.
         """
-        return self.eid_agent.suggest_theme(tone, message) 
\ No newline at end of file
+        return self.eid_agent.suggest_theme(tone, message)
+
+    async def aget_theme(self, tone: str, message: Optional[str] = None) -> str:
+        """
+        Async version of get_theme.
+        """
+        return await self.eid_agent.asuggest_theme(tone, message) 
\ No newline at end of file
@@ -2,7 +2,6 @@
 Main Streamlit application for the Eid Card Generator
 """
 import streamlit as st
-import os
 from dotenv import load_dotenv
 from PIL import Image
 import requests
@@ -10,11 +9,12 @@ from io import BytesIO
 import random
 import base64
 from fpdf import FPDF
-import tempfile
-import time
-from agents import generate_eid_message
+import hashlib
+import re
+import asyncio
+from agents import agenerate_eid_message, stream_eid_message
 from tools import style_card, get_available_themes
-from utils import get_pexels_image, BACKGROUND_CATEGORIES
+from utils import get_pexels_image, fetch_image_bytes, IMAGE_CACHE, BACKGROUND_CATEGORIES
 from utils.font_utils import download_google_fonts
 import emoji
 
@@ -132,66 +132,62 @@ if 'current_background' not in st.session_state:
 if 'background_category' not in st.session_state:
     st.session_state.background_category = "islamic patterns"
 
-def create_pdf_card(card):
-    """Create a PDF version of the card."""
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_margins(20, 20, 20)
+# Boilerplate the model sometimes echoes back from the prompt
+_CLEAN_RE = re.compile(r"\[No Hadith included[^\]]*\]|Note: (?:Do not include|No signature)[^\n]*")
+# Whitespace around line breaks, including blank lines
+_BLANKLINE_RE = re.compile(r"\s*\n\s*")
+
+# Emoji stripping: one str.translate pass deletes single-codepoint emojis and
+# the emoji variation selector; joiners left over from emoji sequences are
+# then dropped, while those between letters (e.g. in Urdu) are kept
+_EMOJI_TABLE = str.maketrans('', '', ''.join(ch for ch in emoji.EMOJI_DATA if len(ch) == 1) + '\ufe0f')
+_STRAY_ZWJ_RE = re.compile(r'(?<!\w)\u200d+|\u200d+(?!\w)')
+
+def strip_emojis(text):
+    """Remove emojis from text."""
+    return _STRAY_ZWJ_RE.sub('', text.translate(_EMOJI_TABLE))
+
+# Per-channel lookup table for a white overlay at 80/255 (~31%) opacity:
+# out = v * (1 - a) + 255 * a
+_OVERLAY_LUT = [round(v * 175 / 255 + 80) for v in range(256)] * 3
+# Largest background size embedded in the PDF (A4 at ~250 DPI)
+_BG_MAX_SIZE = (2100, 2970)
+
+def _overlay_bg(image_data):
+    """Lighten a background image with a white overlay, returning PNG bytes.
+
+    The result only depends on the image, so it is cached by content hash.
+    """
+    key = f"overlay:{_BG_MAX_SIZE[0]}x{_BG_MAX_SIZE[1]}:{hashlib.md5(image_data).hexdigest()}"
+    bg_png = IMAGE_CACHE.get(key)
+    if bg_png is not None:
+        return bg_png
     
-    # Add fonts
+    bg_image = Image.open(BytesIO(image_data))
+    # Downscale before any pixel work; the page never needs more than this
+    bg_image.thumbnail(_BG_MAX_SIZE, Image.LANCZOS)
+    bg_image = bg_image.convert('RGB')
+    # A single table lookup pass; no overlay canvas is allocated
+    bg_with_overlay = bg_image.point(_OVERLAY_LUT)
+    
+    buffer = BytesIO()
+    bg_with_overlay.save(buffer, 'PNG')
+    bg_png = buffer.getvalue()
+    IMAGE_CACHE.set(key, bg_png)
+    return bg_png
+
+def _render_pdf_card(card, bg_png):
+    """Lay out the card over the given background PNG, returned as bytes."""
+    pdf = FPDF()
+    # Fonts are registered per document; fpdf2 font state can't be shared
     pdf.add_font("Roboto", "", "fonts/roboto/roboto.ttf")
     pdf.add_font("Roboto", "B", "fonts/roboto/robotoB.ttf")
     pdf.add_font("Roboto", "I", "fonts/roboto/robotoI.ttf")
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_margins(20, 20, 20)
     
-    # Download and add background image with retry logic
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            session = requests.Session()
-            # Set longer timeouts and keep-alive
-            session.mount('https://', requests.adapters.HTTPAdapter(max_retries=3))
-            response = session.get(
-                card['background_url'],
-                timeout=30,
-                stream=True,
-                headers={'User-Agent': 'Mozilla/5.0'}
-            )
-            response.raise_for_status()
-            
-            # Download the image in chunks
-            chunks = []
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    chunks.append(chunk)
-            
-            image_data = b''.join(chunks)
-            bg_image = Image.open(BytesIO(image_data))
-            break  # Success, exit retry loop
-            
-        except (requests.exceptions.RequestException, IOError) as e:
-            if attempt == max_retries - 1:  # Last attempt
-                # If all retries failed, use a solid color background
-                bg_image = Image.new('RGB', (2100, 2970), (255, 255, 255))
-                st.warning(f"Could not load background image. Using solid background instead. Error: {str(e)}")
-            else:
-                time.sleep(retry_delay)
-                continue
-    
-    # Create a white overlay on the background image
-    overlay = Image.new('RGBA', bg_image.size, (255, 255, 255, 80))  # 80 = ~31% opacity
-    if bg_image.mode != 'RGBA':
-        bg_image = bg_image.convert('RGBA')
-    bg_with_overlay = Image.alpha_composite(bg_image, overlay)
-    bg_with_overlay = bg_with_overlay.convert('RGB')  # Convert to RGB for PDF
-    
-    # Save background temporarily
-    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_bg:
-        bg_with_overlay.save(temp_bg.name, 'PNG')
-        pdf.image(temp_bg.name, x=0, y=0, w=210, h=297)
-    os.unlink(temp_bg.name)
+    pdf.image(BytesIO(bg_png), x=0, y=0, w=210, h=297)
     
     # Add content
     pdf.set_text_color(26, 26, 26)
@@ -204,11 +200,9 @@ def create_pdf_card(card):
     pdf.set_font('Roboto', '', 14)
     # Remove emojis and clean up the message
     message = card['message']
-    message = message.replace("[No Hadith included per your request]", "")
-    message = message.replace("Note: Do not include any signature, HTML tags, or styling code.", "")
-    message = message.replace("Note: No signature, HTML tags, or styling code is included in this message.", "")
-    message = '\n'.join(line.strip() for line in message.split('\n') if line.strip())
-    message = ''.join(char for char in message if not is_emoji(char))
+    message = _CLEAN_RE.sub("", message)
+    message = strip_emojis(message)
+    message = _BLANKLINE_RE.sub("\n", message).strip()
     pdf.multi_cell(0, 10, message)
     
     # Urdu text
@@ -222,71 +216,99 @@ def create_pdf_card(card):
     pdf.cell(0, 10, "With warm wishes,", align='R', new_x="LMARGIN", new_y="NEXT")
     pdf.cell(0, 10, card['sender'], align='R', new_x="LMARGIN", new_y="NEXT")
     
-    # Save to temporary file
-    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
-        pdf.output(temp_pdf.name)
-        return temp_pdf.name
+    return bytes(pdf.output())
 
-def is_emoji(char):
-    """Check if a character is an emoji."""
-    return char in emoji.EMOJI_DATA
+@st.cache_data(ttl=3600, max_entries=50, show_spinner=False)
+def _pdf_card_with_background(card):
+    """Create the PDF over the card's background image.
+
+    Cached on the card's contents, so reruns don't rebuild every PDF. A
+    failed background download raises, so it is never cached.
+    """
+    # Retries and caching live in the helper
+    image_data = fetch_image_bytes(card['background_url'])
+    return _render_pdf_card(card, _overlay_bg(image_data))
+
+def create_pdf_card(card):
+    """Create a PDF version of the card, returned as bytes."""
+    try:
+        return _pdf_card_with_background(card)
+    except (requests.exceptions.RequestException, IOError) as e:
+        # If all retries failed, use a solid color background
+        buffer = BytesIO()
+        Image.new('RGB', (2100, 2970), (255, 255, 255)).save(buffer, 'PNG')
+        st.warning(f"Could not load background image. Using solid background instead. Error: {str(e)}")
+        return _render_pdf_card(card, buffer.getvalue())
 
 def refresh_background():
     """Refresh the background image based on selected category."""
     st.session_state.current_background = get_pexels_image(st.session_state.background_category)
 
+def _card_assets():
+    """Pick fonts and a background for a new card."""
+    # Get a random font combination
+    fonts = download_google_fonts()
+    
+    # Download and inject Google Fonts
+    font_url = fonts["url"]
+    st.markdown(f'<link href="{font_url}" rel="stylesheet">', unsafe_allow_html=True)
+    
+    # Use current background or get new one
+    background_url = st.session_state.current_background
+    if not background_url:
+        background_url = get_pexels_image(st.session_state.background_category)
+        if background_url:
+            st.session_state.current_background = background_url
+        else:
+            st.warning("Could not load background image. Using default background.")
+            background_url = "https://images.pexels.com/photos/1939485/pexels-photo-1939485.jpeg"
+    
+    return fonts, background_url
+
+def _build_card(recipient_name, sender_name, tone, message, fonts, background_url):
+    """Assemble the card data structure from a generated message."""
+    # Clean up the message
+    message = _CLEAN_RE.sub("", message)
+    message = _BLANKLINE_RE.sub("\n", message).strip()
+    
+    # Get card styling based on tone
+    theme_map = {
+        "formal": "Classic",
+        "emotional": "Elegant",
+        "funny": "Modern",
+        "religious": "Classic"
+    }
+    style = style_card(theme_map.get(tone, "Classic"))
+    
+    return {
+        'recipient': recipient_name,
+        'sender': sender_name,
+        'message': message,
+        'background_url': background_url,
+        'style': style,
+        'fonts': fonts
+    }
+
 def create_card(recipient_name, sender_name, tone, include_hadith, include_emojis):
     """Create a new Eid card with the given parameters."""
     try:
-        # Get a random font combination
-        fonts = download_google_fonts()
+        fonts, background_url = _card_assets()
         
-        # Download and inject Google Fonts
-        font_url = fonts["url"]
-        st.markdown(f'<link href="{font_url}" rel="stylesheet">', unsafe_allow_html=True)
-        
-        # Use current background or get new one
-        background_url = st.session_state.current_background
-        if not background_url:
-            background_url = get_pexels_image(st.session_state.background_category)
-            if background_url:
-                st.session_state.current_background = background_url
-            else:
-                st.warning("Could not load background image. Using default background.")
-                background_url = "https://images.pexels.com/photos/1939485/pexels-photo-1939485.jpeg"
-        
-        # Generate message using OpenRouter API
-        message = generate_eid_message(
+        # Generate message using OpenRouter API, showing it as it streams in
+        placeholder = st.empty()
+        message = ""
+        for chunk in stream_eid_message(
             tone=tone,
             recipient=recipient_name,
             sender=sender_name,
             include_hadith=include_hadith,
             include_emojis=include_emojis
-        )
-        
-        # Clean up the message
-        message = message.replace("[No Hadith included, as per your requirements]", "")
-        message = message.replace("Note: No signature, HTML tags, or styling code is included in this message.", "")
-        message = "\n".join(line for line in message.split("\n") if line.strip())
-        
-        # Get card styling based on tone
-        theme_map = {
-            "formal": "Classic",
-            "emotional": "Elegant",
-            "funny": "Modern",
-            "religious": "Classic"
-        }
-        style = style_card(theme_map.get(tone, "Classic"))
+        ):
+            message += chunk
+            placeholder.markdown(message)
+        placeholder.empty()
         
-        # Create card data structure
-        card = {
-            'recipient': recipient_name,
-            'sender': sender_name,
-            'message': message,
-            'background_url': background_url,
-            'style': style,
-            'fonts': fonts
-        }
+        card = _build_card(recipient_name, sender_name, tone, message, fonts, background_url)
         
         # Add to session state
         st.session_state.cards.insert(0, card)  # Add new card at the beginning
@@ -296,6 +318,40 @@ def create_card(recipient_name, sender_name, tone, include_hadith, include_emoji
         st.error(f"Error creating card: {str(e)}")
         return False
 
+# Maximum number of cards generated at the same time in a batch
+BATCH_CONCURRENCY = 5
+
+def create_cards(recipient_names, sender_name, tone, include_hadith, include_emojis):
+    """Create one Eid card per recipient, generating the messages concurrently."""
+    async def one_card(recipient_name, semaphore):
+        async with semaphore:
+            return await agenerate_eid_message(
+                tone=tone,
+                recipient=recipient_name,
+                sender=sender_name,
+                include_hadith=include_hadith,
+                include_emojis=include_emojis
+            )
+    
+    async def all_cards():
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        return await asyncio.gather(*(one_card(name, semaphore) for name in recipient_names))
+    
+    try:
+        messages = asyncio.run(all_cards())
+        cards = []
+        for recipient_name, message in zip(recipient_names, messages):
+            fonts, background_url = _card_assets()
+            cards.append(_build_card(recipient_name, sender_name, tone, message, fonts, background_url))
+        
+        # Add to session state, keeping the batch in the order it was entered
+        st.session_state.cards[:0] = cards
+        
+        return True
+    except Exception as e:
+        st.error(f"Error creating cards: {str(e)}")
+        return False
+
 # Title and description
 st.title("🌙 Eid Card Generator")
 st.markdown("Create beautiful Eid greeting cards with AI-generated messages and dynamic styling!")
@@ -332,21 +388,46 @@ with col1:
         include_emojis = emoji_count > 0
         include_hadith = st.checkbox("Include a Hadith", value=False)
         
+        extra_recipients = st.text_area(
+            "More Recipients (one per line)",
+            placeholder="Optional: add more names to create a card for each",
+            help="Cards for several recipients are generated at the same time"
+        )
+        
         submit_button = st.form_submit_button("Generate Card")
         
-        if submit_button and recipient_name and sender_name:
-            with st.spinner("Creating your Eid card..."):
-                success = create_card(
-                    recipient_name,
-                    sender_name,
-                    tone,
-                    include_hadith,
-                    include_emojis
-                )
-                if success:
-                    st.success("Card created successfully!")
+        # Collect every recipient, dropping blanks and duplicates
+        recipient_names = list(dict.fromkeys(
+            name.strip()
+            for name in [recipient_name, *extra_recipients.splitlines()]
+            if name.strip()
+        ))
+        
+        if submit_button and recipient_names and sender_name:
+            if len(recipient_names) == 1:
+                with st.spinner("Creating your Eid card..."):
+                    success = create_card(
+                        recipient_names[0],
+                        sender_name,
+                        tone,
+                        include_hadith,
+                        include_emojis
+                    )
+                    if success:
+                        st.success("Card created successfully!")
+            else:
+                with st.spinner(f"Creating {len(recipient_names)} Eid cards..."):
+                    success = create_cards(
+                        recipient_names,
+                        sender_name,
+                        tone,
+                        include_hadith,
+                        include_emojis
+                    )
+                    if success:
+                        st.success(f"{len(recipient_names)} cards created successfully!")
         elif submit_button:
-            if not recipient_name:
+            if not recipient_names:
                 st.error("Please enter the recipient's name")
             if not sender_name:
                 st.error("Please enter your name")
@@ -398,19 +479,15 @@ if st.session_state.cards:
             """, unsafe_allow_html=True)
             
             # Generate PDF for download
-            pdf_path = create_pdf_card(card)
+            pdf_bytes = create_pdf_card(card)
             
             # Download button
-            with open(pdf_path, "rb") as file:
-                btn = st.download_button(
-                    label="📥 Download Card as PDF",
-                    data=file,
-                    file_name=f"eid_card_{i}.pdf",
-                    mime="application/pdf"
-                )
-            
-            # Clean up temporary PDF file
-            os.remove(pdf_path)
+            btn = st.download_button(
+                label="📥 Download Card as PDF",
+                data=pdf_bytes,
+                file_name=f"eid_card_{i}.pdf",
+                mime="application/pdf"
+            )
         
         with cols[1]:
             if st.button("❌", key=f"delete_{i}"):
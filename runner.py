@@ -2,6 +2,7 @@
 Runner module for managing agent execution flow.
 """
 from typing import Dict, Optional, Tuple
+import asyncio
 import os
 from pathlib import Path
 import tempfile
@@ -27,7 +28,7 @@ class EidCardRunner:
         self.message_agent = MessageCraftAgent(self.eid_agent)
         self.style_agent = StyleAgent(self.eid_agent)
     
-    def generate_card(
+    async def generate_card(
         self,
         recipient: str,
         tone: str,
@@ -48,15 +49,17 @@ class EidCardRunner:
         Returns:
             Tuple of (message, preview_html, pdf_path)
         """
-        # Generate message
-        message = self.message_agent.craft_message(
+        # Generate message and pick a theme concurrently; the theme is
+        # suggested from the tone alone so it doesn't wait on the message
+        message_task = asyncio.create_task(self.message_agent.acraft_message(
             recipient=recipient,
             tone=tone,
             preferences=preferences
-        )
+        ))
+        theme_task = asyncio.create_task(self.style_agent.aget_theme(tone))
+        message, theme_name = await asyncio.gather(message_task, theme_task)
         
-        # Get theme and apply custom colors
-        theme_name = self.style_agent.get_theme(tone, message)
+        # Apply custom colors
         theme = style_card(theme_name, shape)
         
         # Override theme colors with user preferences if provided
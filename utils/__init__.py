@@ -2,17 +2,32 @@
 Utility functions for image handling and Pexels API integration
 """
 import os
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import random
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from PIL import Image
 from io import BytesIO
+from diskcache import Cache
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Shared HTTP session so connections (TCP + TLS) are reused across requests
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=1)
+))
+
+# On-disk cache for downloaded background images, keyed by URL
+IMAGE_CACHE = Cache(os.path.expanduser("~/.eid_img_cache"), size_limit=256 * 1024 * 1024)
+
 BACKGROUND_CATEGORIES = [
     "islamic architecture",
     "mosque",
@@ -24,6 +39,44 @@ BACKGROUND_CATEGORIES = [
     "islamic art"
 ]
 
+# Pexels search results by (query, api_key), kept for a few minutes.
+# A plain dict rather than st.cache_data, so utils doesn't import streamlit
+SEARCH_CACHE_TTL = 300  # seconds
+_SEARCH_CACHE: Dict[Tuple[str, str], Tuple[float, tuple]] = {}
+
+def _search_pexels(query: str, api_key: str, max_retries: int) -> tuple:
+    """
+    Search Pexels and return the image URLs of all matching photos.
+    Results are cached per query for a few minutes so repeat searches skip the API.
+    """
+    cached = _SEARCH_CACHE.get((query, api_key))
+    if cached and time.monotonic() - cached[0] < SEARCH_CACHE_TTL:
+        return cached[1]
+    
+    headers = {"Authorization": api_key}
+    base_url = "https://api.pexels.com/v1/search"
+    params = {
+        "query": query,
+        "per_page": 20,
+        "orientation": "landscape"
+    }
+    
+    for attempt in range(max_retries):
+        try:
+            response = _SESSION.get(base_url, headers=headers, params=params)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            urls = tuple(photo["src"]["large2x"] for photo in data.get("photos", []))
+            _SEARCH_CACHE[(query, api_key)] = (time.monotonic(), urls)
+            return urls
+            
+        except requests.exceptions.RequestException as e:
+            if attempt == max_retries - 1:
+                raise e
+            time.sleep(1)
+    
+    return ()
+
 def get_pexels_image(query: str, api_key: Optional[str] = None, max_retries: int = 3) -> Optional[str]:
     """
     Fetch a random image URL from Pexels API based on the query
@@ -41,31 +94,51 @@ def get_pexels_image(query: str, api_key: Optional[str] = None, max_retries: int
     if not api_key:
         raise ValueError("Pexels API key not found. Please set PEXELS_API_KEY in your .env file")
     
-    headers = {"Authorization": api_key}
-    base_url = "https://api.pexels.com/v1/search"
-    params = {
-        "query": query,
-        "per_page": 20,
-        "orientation": "landscape"
-    }
+    urls = _search_pexels(query, api_key, max_retries)
+    if not urls:
+        return None
+    
+    return random.choice(urls)  # Return the URL directly
+
+def fetch_image_bytes(url: str, max_retries: int = 3, retry_delay: int = 1) -> bytes:
+    """
+    Download an image, serving repeat downloads from the on-disk cache
+    
+    Args:
+        url: Image URL
+        max_retries: Number of retries for failed requests
+        retry_delay: Seconds to wait between retries
+        
+    Returns:
+        bytes: Raw image data
+    """
+    image_data = IMAGE_CACHE.get(url)
+    if image_data is not None:
+        return image_data
     
     for attempt in range(max_retries):
         try:
-            response = requests.get(base_url, headers=headers, params=params)
+            response = _SESSION.get(
+                url,
+                timeout=30,
+                headers={'User-Agent': 'Mozilla/5.0'}
+            )
             response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("photos"):
-                return None
-            
-            photo = random.choice(data["photos"])
-            return photo["src"]["large2x"]  # Return the URL directly
+            image_data = response.content
+            break  # Success, exit retry loop
             
         except requests.exceptions.RequestException as e:
             if attempt == max_retries - 1:
                 raise e
-            time.sleep(1)
+            time.sleep(retry_delay)
     
-    return None
+    IMAGE_CACHE.set(url, image_data)
+    return image_data
 
-from utils.pdf_generator import create_pdf, create_preview 
\ No newline at end of file
+def __getattr__(name):
+    # Re-export the PDF helpers lazily, so importing utils (or
+    # utils.font_utils / utils.image_utils) does not load fpdf
+    if name in ("create_pdf", "create_preview"):
+        from utils import pdf_generator
+        return getattr(pdf_generator, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -37,6 +37,9 @@ ADDITIONAL_COMBINATIONS = [
     }
 ]
 
+# Every combination, built once for random picks and listing
+_ALL_COMBINATIONS = tuple(FONT_COMBINATIONS.values()) + tuple(ADDITIONAL_COMBINATIONS)
+
 def download_google_fonts(theme: Optional[str] = None) -> Dict[str, str]:
     """
     Get a font combination for the card, either based on theme or randomly.
@@ -51,8 +54,7 @@ def download_google_fonts(theme: Optional[str] = None) -> Dict[str, str]:
         return FONT_COMBINATIONS[theme]
     
     # If no theme specified or theme not found, return random combination
-    all_combinations = list(FONT_COMBINATIONS.values()) + ADDITIONAL_COMBINATIONS
-    return random.choice(all_combinations)
+    return random.choice(_ALL_COMBINATIONS)
 
 def get_available_fonts() -> List[Dict[str, str]]:
     """
@@ -61,4 +63,4 @@ def get_available_fonts() -> List[Dict[str, str]]:
     Returns:
         List of dictionaries containing font information
     """
-    return list(FONT_COMBINATIONS.values()) + ADDITIONAL_COMBINATIONS 
\ No newline at end of file
+    return list(_ALL_COMBINATIONS) 
\ No newline at end of file
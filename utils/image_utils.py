@@ -3,9 +3,14 @@ Utility functions for handling images in the Eid Card Generator.
 """
 import os
 import random
+import time
+import orjson
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 # Background categories with their search terms
 BACKGROUND_CATEGORIES = [
@@ -30,74 +35,112 @@ SEARCH_TERMS = {
     "Nature & Flowers": ["islamic garden", "arabic floral", "islamic floral", "moroccan garden"]
 }
 
+PEXELS_SEARCH_URL = "https://api.pexels.com/v1/search"
+MAX_PARALLEL_SEARCHES = 8
+
+# Shared session so parallel searches reuse pooled connections. Responses are
+# cached on disk for an hour, since results for a search term change slowly.
+_SESSION = requests_cache.CachedSession(
+    os.path.expanduser("~/.eid_pexels_cache"),
+    backend="sqlite",
+    expire_after=3600,
+    allowable_methods=("GET",)
+)
+# Size the pool to the search fan-out so parallel searches never wait for a connection
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=MAX_PARALLEL_SEARCHES,
+    pool_maxsize=MAX_PARALLEL_SEARCHES
+))
+
+# Candidate image URLs per category, with the time they were fetched
+CATEGORY_CACHE_TTL = 900  # seconds
+_CATEGORY_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+
+def _search_photos(search_term: str, params: dict, quality_only: bool) -> List[str]:
+    """
+    Run one Pexels search and return the image URLs of the usable photos.
+    """
+    response = _SESSION.get(
+        PEXELS_SEARCH_URL,
+        params={**params, "query": search_term}
+    )
+    response.raise_for_status()
+    
+    data = orjson.loads(response.content)
+    if data.get("total_results", 0) == 0:
+        return []
+    
+    # Keep only the URLs, filtering for high-quality images if asked
+    return [
+        p["src"]["large2x"] for p in data.get("photos", [])
+        if not quality_only or (p["width"] >= 1200 and p["height"] >= 800)
+    ]
+
+def _first_photos(search_terms: List[str], params: dict, quality_only: bool) -> List[str]:
+    """
+    Run the searches concurrently and return the image URLs of the first
+    one that finds any, cancelling the searches still pending.
+    """
+    executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_SEARCHES)
+    futures = [
+        executor.submit(_search_photos, term, params, quality_only)
+        for term in search_terms
+    ]
+    try:
+        for future in as_completed(futures):
+            try:
+                urls = future.result()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Pexels search failed: {str(e)}")
+                continue
+            if urls:
+                return urls
+        return []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def get_pexels_image(category: str) -> Optional[str]:
     """
     Get a random image URL from Pexels API based on the category.
     """
+    # Serve a different image from the last search while it is fresh
+    cached = _CATEGORY_CACHE.get(category)
+    if cached and time.monotonic() - cached[0] < CATEGORY_CACHE_TTL:
+        return random.choice(cached[1])
+    
     try:
         api_key = os.getenv("PEXELS_API_KEY")
         if not api_key:
             logger.error("PEXELS_API_KEY not found in environment variables")
             return None
 
-        headers = {"Authorization": api_key}
+        # Set the key on the shared session once, rather than per request
+        if _SESSION.headers.get("Authorization") != api_key:
+            _SESSION.headers["Authorization"] = api_key
+        
+        # Search parameters
+        params = {
+            "orientation": "landscape",
+            "size": "large",
+            "per_page": 5,  # a handful is plenty after filtering; less to transfer and parse
+            "min_width": 1200, 
+            "min_height": 800
+        }
         
-        # Get search terms for the category
+        # Search all of the category's terms at once
         search_terms = SEARCH_TERMS.get(category, SEARCH_TERMS["Islamic Patterns"])
+        urls = _first_photos(search_terms, params, quality_only=True)
         
-        # Try each search term until we find a suitable image
-        for search_term in search_terms:
-            # Search parameters
-            params = {
-                "query": search_term,
-                "orientation": "landscape",
-                "size": "large",
-                "per_page": 20,
-                "min_width": 1200, 
-                "min_height": 800
-            }
-            
-            # Make API request
-            response = requests.get(
-                "https://api.pexels.com/v1/search",
-                headers=headers,
-                params=params
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Check if we got any results
-            if data.get("total_results", 0) > 0:
-                photos = data.get("photos", [])
-                if photos:
-                    # Filter for high-quality images
-                    quality_photos = [
-                        p for p in photos 
-                        if p["width"] >= 1200 and p["height"] >= 800
-                    ]
-                    if quality_photos:
-                        chosen_photo = random.choice(quality_photos)
-                        return chosen_photo["src"]["large2x"]
+        # If no results found, try the fallback categories' terms at once
+        if not urls:
+            fallback_categories = ["Islamic Patterns", "Geometric Patterns", "Nature & Flowers"]
+            fallback_terms = [term for fallback in fallback_categories for term in SEARCH_TERMS[fallback]]
+            urls = _first_photos(fallback_terms, params, quality_only=False)
         
-        # If no results found, try fallback categories
-        fallback_categories = ["Islamic Patterns", "Geometric Patterns", "Nature & Flowers"]
-        for category in fallback_categories:
-            for search_term in SEARCH_TERMS[category]:
-                params["query"] = search_term
-                response = requests.get(
-                    "https://api.pexels.com/v1/search",
-                    headers=headers,
-                    params=params
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get("total_results", 0) > 0:
-                    photos = data.get("photos", [])
-                    if photos:
-                        chosen_photo = random.choice(photos)
-                        return chosen_photo["src"]["large2x"]
+        if urls:
+            # Keep every candidate so later calls can vary without searching
+            _CATEGORY_CACHE[category] = (time.monotonic(), urls)
+            return random.choice(urls)
         
         # If still no results, return None
         logger.warning("No images found on Pexels for any search terms")
@@ -105,4 +148,4 @@ def get_pexels_image(category: str) -> Optional[str]:
         
     except Exception as e:
         logger.error(f"Error fetching image from Pexels: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
@@ -4,18 +4,41 @@ PDF generation utilities for EidiCard.
 from fpdf import FPDF
 from pathlib import Path
 import tempfile
-from typing import Optional, Dict
-import textwrap
+from typing import Optional, Dict, Tuple, Union
+from dataclasses import dataclass
 import re
 import os
+import html
+import string
+import functools
+import json
+import shutil
+import time
+import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 # Font management
 FONTS_DIR = Path(__file__).parent.parent / 'fonts'
 FONTS_DIR.mkdir(exist_ok=True)
 
+# Roboto styles bundled under fonts/roboto
+ROBOTO_FONTS = {
+    style: FONTS_DIR / 'roboto' / f"roboto{style}.ttf" for style in ('', 'B', 'I')
+}
+
+# Fonts older than this are revalidated against the server
+FONT_MAX_AGE = 30 * 86400
+
+# Font families whose files are all known to be on disk
+_FONT_READY: Dict[str, bool] = {}
+
 def get_font_path(font_name: str) -> str:
     """Download and cache Google Fonts."""
+    font_base = font_name.lower()
+    if _FONT_READY.get(font_base):
+        return str(FONTS_DIR / font_base / f"{font_base}.ttf")
+    
     font_urls = {
         'roboto': {
             '': 'https://github.com/googlefonts/roboto/raw/main/src/hinted/Roboto-Regular.ttf',
@@ -24,7 +47,6 @@ def get_font_path(font_name: str) -> str:
         }
     }
     
-    font_base = font_name.lower()
     if font_base not in font_urls:
         return ''
     
@@ -34,67 +56,129 @@ def get_font_path(font_name: str) -> str:
     
     def download_font(style: str) -> str:
         font_path = font_dir / f"{font_base}{style}.ttf"
-        if not font_path.exists():
-            url = font_urls[font_base][style]
+        meta_path = font_dir / f"{font_base}{style}.ttf.meta"
+        headers = {}
+        if font_path.exists():
+            if time.time() - font_path.stat().st_mtime < FONT_MAX_AGE:
+                return str(font_path)
+            # Revalidate an old copy so an unchanged font is not fetched again
             try:
-                urllib.request.urlretrieve(url, font_path)
-            except Exception as e:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        url = font_urls[font_base][style]
+        # Download to a temporary file and move it into place, so a
+        # concurrent card generation never sees a half-written font
+        fd, tmp_path = tempfile.mkstemp(dir=font_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            request = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(request, timeout=10) as resp, open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(resp, f, length=65536)
+                meta = {
+                    'etag': resp.headers.get('ETag'),
+                    'last_modified': resp.headers.get('Last-Modified')
+                }
+            os.replace(tmp_path, font_path)
+            meta_path.write_text(json.dumps(meta))
+        except urllib.error.HTTPError as e:
+            os.remove(tmp_path)
+            if e.code == 304:
+                # Not modified, keep the copy we have for another while
+                os.utime(font_path)
+            elif not font_path.exists():
+                print(f"Error downloading font: {e}")
+                return ''
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if not font_path.exists():
                 print(f"Error downloading font: {e}")
                 return ''
         return str(font_path)
     
-    # Download all font styles
-    for style in font_urls[font_base]:
-        download_font(style)
+    # Download all font styles at once
+    styles = list(font_urls[font_base])
+    with ThreadPoolExecutor(max_workers=len(styles)) as executor:
+        paths = list(executor.map(download_font, styles))
+    
+    # Only skip future checks once every style is present
+    _FONT_READY[font_base] = all(paths)
     
     return str(font_dir / f"{font_base}.ttf")
 
-def remove_emojis(text):
+_EMOJI_RE = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE)
+
+@functools.lru_cache(maxsize=4096)
+def remove_emojis(text: str) -> str:
     """Remove emojis from text while preserving other Unicode characters."""
-    emoji_pattern = re.compile("["
-        u"\U0001F600-\U0001F64F"  # emoticons
-        u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-        u"\U0001F680-\U0001F6FF"  # transport & map symbols
-        u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        u"\U00002702-\U000027B0"
-        u"\U000024C2-\U0001F251"
-        "]+", flags=re.UNICODE)
-    return emoji_pattern.sub('', text)
+    return _EMOJI_RE.sub('', text)
+
+def _hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    """Parse a '#rrggbb' color into an (r, g, b) tuple."""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+@dataclass(slots=True)
+class Theme:
+    """Card colors, with the text colors parsed from a theme dictionary once."""
+    title_rgb: Tuple[int, int, int]
+    text_rgb: Tuple[int, int, int]
+    # Kept as given; any CSS color is valid here
+    bg: str
+
+    @classmethod
+    def from_dict(cls, theme: Dict[str, str]) -> "Theme":
+        return cls(
+            title_rgb=_hex_to_rgb(theme.get('title_color', '#4a4a4a')),
+            text_rgb=_hex_to_rgb(theme.get('text_color', '#000000')),
+            bg=theme.get('bg_color', '#ffffff')
+        )
 
 class EidCard(FPDF):
-    def __init__(self, theme: Dict[str, str]):
+    def __init__(self, theme: Union[Theme, Dict[str, str]]):
         super().__init__(format='A4')  # Use A4 format
-        self.theme = theme
+        self.set_theme(theme)
         # Set reasonable margins
         self.set_margins(left=20, top=20, right=20)
         self.set_auto_page_break(auto=True, margin=20)
         
-        # Use Roboto font for better Unicode support
-        font_path = get_font_path('roboto')
+        # Use Roboto font for better Unicode support, from the copy shipped
+        # in the repo, only downloading it if those files are missing
+        if all(path.exists() for path in ROBOTO_FONTS.values()):
+            font_path = str(ROBOTO_FONTS[''])
+        else:
+            font_path = get_font_path('roboto')
         if font_path:
-            self.add_font('Roboto', '', font_path, uni=True)
-            self.add_font('Roboto', 'B', str(FONTS_DIR / 'roboto' / 'robotoB.ttf'), uni=True)
-            self.add_font('Roboto', 'I', str(FONTS_DIR / 'roboto' / 'robotoI.ttf'), uni=True)
+            for style, path in ROBOTO_FONTS.items():
+                self.add_font('Roboto', style, str(path), uni=True)
             self.default_font = 'Roboto'
         else:
             # Fallback to built-in font if download fails
             self.add_font('Helvetica', '', uni=True)
             self.default_font = 'Helvetica'
     
+    def set_theme(self, theme: Union[Theme, Dict[str, str]]):
+        """Use a theme, parsing a theme dictionary's colors once up front."""
+        self.theme = theme if isinstance(theme, Theme) else Theme.from_dict(theme)
+    
     def header(self):
         # Add fancy header with Eid theme
         self.set_font(self.default_font, 'B', 24)
-        self.set_text_color(
-            int(self.theme.get('title_color', '#4a4a4a')[1:3], 16),
-            int(self.theme.get('title_color', '#4a4a4a')[3:5], 16),
-            int(self.theme.get('title_color', '#4a4a4a')[5:7], 16)
-        )
-        # Calculate width of text
-        title = 'Eid Mubarak'
-        title_w = self.get_string_width(title)
-        # Center text horizontally
-        self.set_x((210 - title_w) / 2)  # 210 is A4 width in mm
-        self.cell(title_w, 20, title, 0, 1, 'C')
+        self.set_text_color(*self.theme.title_rgb)
+        # Full-width cell, so the title is centered on any page size
+        self.cell(0, 20, 'Eid Mubarak', 0, 1, 'C')
         self.ln(10)
 
     def footer(self):
@@ -104,10 +188,13 @@ class EidCard(FPDF):
         self.set_text_color(128, 128, 128)
         self.cell(0, 10, 'Created with EidiCard Generator', 0, 0, 'C')
 
+# Fallback card bytes by header color, which is all the theme changes there
+_FALLBACK_PDF_BYTES: Dict[Tuple[int, int, int], bytes] = {}
+
 def create_pdf(
     message: str,
     recipient: str,
-    theme: Dict[str, str],
+    theme: Union[Theme, Dict[str, str]],
     output_path: Optional[str] = None
 ) -> str:
     """
@@ -116,7 +203,7 @@ def create_pdf(
     Args:
         message: The Eid greeting message
         recipient: Name of the recipient
-        theme: Dictionary containing theme colors and styles
+        theme: Theme, or dictionary containing theme colors and styles
         output_path: Optional path to save the PDF
     
     Returns:
@@ -127,36 +214,24 @@ def create_pdf(
     pdf.add_page()
     
     # Set colors from theme
-    pdf.set_text_color(
-        int(theme.get('text_color', '#000000')[1:3], 16),
-        int(theme.get('text_color', '#000000')[3:5], 16),
-        int(theme.get('text_color', '#000000')[5:7], 16)
-    )
+    pdf.set_text_color(*pdf.theme.text_rgb)
     
     # Remove emojis from text for PDF
     clean_message = remove_emojis(message)
     clean_recipient = remove_emojis(recipient)
     
-    # Add recipient with proper width calculation
+    # Add recipient
     pdf.set_font(pdf.default_font, 'B', 16)
-    recipient_text = f'Dear {clean_recipient},'
-    recipient_w = pdf.get_string_width(recipient_text)
-    pdf.cell(recipient_w, 10, recipient_text, 0, 1, 'L')
+    pdf.cell(0, 10, f'Dear {clean_recipient},', 0, 1, 'L')
     pdf.ln(10)
     
     # Add message with word wrapping
     pdf.set_font(pdf.default_font, '', 12)
     
-    # Calculate available width for text (page width minus margins)
-    effective_width = pdf.w - pdf.l_margin - pdf.r_margin
-    # Convert width from mm to characters (approximate)
-    chars_per_line = int(effective_width / (pdf.get_string_width('x') * 1.1))
-    
-    # Word wrap the message
-    lines = textwrap.wrap(clean_message, width=chars_per_line)
-    for line in lines:
-        pdf.multi_cell(effective_width, 8, line, 0, 'L')
-        pdf.ln(2)  # Small gap between lines
+    # Let FPDF wrap the whole message by measured glyph widths across the
+    # full width between the margins; the 10mm line height matches the
+    # previous 8mm lines plus 2mm gap
+    pdf.multi_cell(0, 10, clean_message, 0, 'L')
     
     # Save the PDF
     if not output_path:
@@ -167,51 +242,40 @@ def create_pdf(
         pdf.output(output_path)
     except Exception as e:
         # If PDF generation fails, create a simpler version without special characters
-        pdf = EidCard(theme)
-        pdf.add_page()
-        pdf.set_font(pdf.default_font, 'B', 24)
-        pdf.cell(0, 20, 'Eid Mubarak', 0, 1, 'C')
-        pdf.ln(10)
-        pdf.set_font(pdf.default_font, '', 12)
-        pdf.multi_cell(0, 10, "May this Eid bring you joy and happiness.\nBest wishes to you and your family.")
-        pdf.output(output_path)
+        title_rgb = pdf.theme.title_rgb
+        fallback = _FALLBACK_PDF_BYTES.get(title_rgb)
+        if fallback is None:
+            pdf = EidCard(pdf.theme)
+            pdf.add_page()
+            pdf.set_font(pdf.default_font, 'B', 24)
+            pdf.cell(0, 20, 'Eid Mubarak', 0, 1, 'C')
+            pdf.ln(10)
+            pdf.set_font(pdf.default_font, '', 12)
+            pdf.multi_cell(0, 10, "May this Eid bring you joy and happiness.\nBest wishes to you and your family.")
+            fallback = _FALLBACK_PDF_BYTES[title_rgb] = bytes(pdf.output())
+        Path(output_path).write_bytes(fallback)
     
     return output_path
 
-def create_preview(
-    message: str,
-    recipient: str,
-    theme: Dict[str, str]
-) -> str:
-    """
-    Create an HTML preview of the Eid card.
-    
-    Args:
-        message: The Eid greeting message
-        recipient: Name of the recipient
-        theme: Dictionary containing theme colors and styles
-    
-    Returns:
-        HTML string for preview
-    """
-    # Replace newlines with <br> for HTML
-    message_html = message.replace('\n', '<br>')
-    
-    html_template = f"""
-    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
+# HTML preview template, parsed once at import
+_PREVIEW_TMPL = string.Template("""
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link rel="preload" as="style" href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet"></noscript>
     <div style="
         max-width: 600px;
         margin: 20px auto;
         padding: 20px;
         border-radius: 10px;
-        background-color: {theme.get('bg_color', '#ffffff')};
-        color: {theme.get('text_color', '#000000')};
+        background-color: $bg_color;
+        color: $text_color;
         font-family: 'Roboto', sans-serif;
         box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
     ">
         <h1 style="
             text-align: center;
-            color: {theme.get('title_color', '#4a4a4a')};
+            color: $title_color;
             font-family: 'Roboto', sans-serif;
             font-weight: 700;
         ">
@@ -221,7 +285,7 @@ def create_preview(
             margin-top: 20px;
             font-family: 'Roboto', sans-serif;
             font-weight: 700;
-        ">Dear {recipient},</h2>
+        ">Dear $recipient,</h2>
         <div style="
             white-space: pre-wrap;
             line-height: 1.6;
@@ -229,8 +293,32 @@ def create_preview(
             font-family: 'Roboto', sans-serif;
             font-weight: 400;
         ">
-            {message_html}
+            $message_html
         </div>
     </div>
+    """)
+
+def create_preview(
+    message: str,
+    recipient: str,
+    theme: Dict[str, str]
+) -> str:
+    """
+    Create an HTML preview of the Eid card.
+    
+    Args:
+        message: The Eid greeting message
+        recipient: Name of the recipient
+        theme: Dictionary containing theme colors and styles
+    
+    Returns:
+        HTML string for preview
     """
-    return html_template 
\ No newline at end of file
+    return _PREVIEW_TMPL.substitute(
+        bg_color=theme.get('bg_color', '#ffffff'),
+        text_color=theme.get('text_color', '#000000'),
+        title_color=theme.get('title_color', '#4a4a4a'),
+        recipient=html.escape(recipient),
+        # Replace newlines with <br> for HTML
+        message_html=html.escape(message).replace('\n', '<br>')
+    ) 
\ No newline at end of file